@@ -0,0 +1,12 @@
+"""
+Shared pytest configuration for AI Tech Career Path Finder tests
+"""
+
+
+def pytest_addoption(parser):
+    parser.addoption(
+        "--no-llm-cache",
+        action="store_true",
+        default=False,
+        help="Ignore cached Azure OpenAI responses and refresh them from the live API"
+    )
@@ -3,20 +3,31 @@ FastAPI backend for AI Tech Career Path Finder
 Uses Azure OpenAI (GPT-4o) to generate personalized learning plans
 """
 
-from fastapi import FastAPI, File, UploadFile, Form, HTTPException
-from fastapi.responses import HTMLResponse, FileResponse, JSONResponse
+from fastapi import FastAPI, File, UploadFile, Form, HTTPException, BackgroundTasks, Request
+from fastapi.responses import HTMLResponse, ORJSONResponse, Response, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 from typing import Optional
+import asyncio
+import hashlib
 import os
 import json
+import time
+from collections import OrderedDict
 from datetime import datetime
 from dotenv import load_dotenv
-from openai import AzureOpenAI
+from openai import AsyncAzureOpenAI
+import httpx
+from jinja2 import Environment
 from pypdf import PdfReader
 import docx
 from xhtml2pdf import pisa
+try:
+    from weasyprint import HTML, CSS
+except (ImportError, OSError):
+    # WeasyPrint needs the Pango system libraries; fall back to xhtml2pdf without them
+    HTML = CSS = None
 from io import BytesIO
 import re
 from storage_utils import storage_manager
@@ -29,7 +40,7 @@ logger = logging.getLogger(__name__)
 # Load environment variables
 load_dotenv()
 
-app = FastAPI(title="AI Tech Career Path Finder")
+app = FastAPI(title="AI Tech Career Path Finder", default_response_class=ORJSONResponse)
 
 # CORS middleware
 app.add_middleware(
@@ -47,21 +58,85 @@ app.mount("/static", StaticFiles(directory="static"), name="static")
 
 # Azure OpenAI Configuration (using environment variables - secure approach)
 azure_client = None
+azure_http_client = None
+
+def create_azure_http_client() -> httpx.AsyncClient:
+    """Shared HTTP/2 client with a connection pool sized for concurrent plan generation"""
+    return httpx.AsyncClient(
+        limits=httpx.Limits(max_connections=100, max_keepalive_connections=50),
+        # Reads must outlast the slowest generation (a non-streamed PLAN_RETRY_MAX_TOKENS plan),
+        # otherwise the call times out and the client's retries repeat it at full token cost
+        timeout=httpx.Timeout(180.0, connect=5.0),
+        http2=True
+    )
 
 def get_azure_openai_client():
     """Initialize Azure OpenAI client with proper error handling"""
-    global azure_client
+    global azure_client, azure_http_client
     if azure_client is None:
         try:
-            azure_client = AzureOpenAI(
+            if azure_http_client is None:
+                azure_http_client = create_azure_http_client()
+            azure_client = AsyncAzureOpenAI(
                 api_key=os.getenv("AZURE_OPENAI_API_KEY"),
                 api_version=os.getenv("AZURE_OPENAI_API_VERSION", "2024-02-15-preview"),
-                azure_endpoint=os.getenv("AZURE_OPENAI_ENDPOINT")
+                azure_endpoint=os.getenv("AZURE_OPENAI_ENDPOINT"),
+                http_client=azure_http_client
             )
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"Failed to initialize Azure OpenAI client: {str(e)}")
     return azure_client
 
+async def close_azure_openai_client():
+    """Close the shared HTTP client; the next call to get_azure_openai_client builds a new one"""
+    global azure_client, azure_http_client
+    if azure_http_client is not None:
+        await azure_http_client.aclose()
+    azure_client = None
+    azure_http_client = None
+
+# In-process cache of generated plans
+PLAN_CACHE_SIZE = 256
+PLAN_CACHE_TTL_SECONDS = 3600
+
+class PlanCache:
+    """
+    Small LRU cache with per-entry expiry for generated career plans
+    Keyed by a hash of the prompt inputs so identical profiles skip the LLM call
+    """
+
+    def __init__(self, max_size: int = PLAN_CACHE_SIZE, ttl_seconds: int = PLAN_CACHE_TTL_SECONDS):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries: OrderedDict = OrderedDict()
+
+    @staticmethod
+    def make_key(profile: dict, resume_text: Optional[str] = None) -> str:
+        """Build a canonical key from the profile fields and resume text"""
+        payload = json.dumps(profile, sort_keys=True).encode('utf-8') + (resume_text or "").encode('utf-8')
+        return hashlib.blake2b(payload, digest_size=16).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached plan, or None if missing or expired"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: str):
+        """Store a plan, evicting the least recently used entry when full"""
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+plan_cache = PlanCache()
+
 # Pydantic models
 class UserProfile(BaseModel):
     experience_level: str
@@ -78,14 +153,50 @@ class CareerPlan(BaseModel):
     user_profile: dict
 
 # Helper functions
+_INTEREST_SPLIT = re.compile(r"\s*,\s*")
+_UNSAFE_FILENAME_CHARS = re.compile(r"[^A-Za-z0-9._-]")
+
+MAX_RESUME_PAGES = 20
+MAX_RESUME_CHARS = 2000
+MAX_FILE_SIZE = int(os.getenv("MAX_FILE_SIZE", 10 * 1024 * 1024))
+ALLOWED_FILE_TYPES = frozenset(
+    ext.strip().lower() for ext in os.getenv("ALLOWED_FILE_TYPES", ".pdf,.doc,.docx,.txt").split(",") if ext.strip()
+)
+UPLOAD_CHUNK_SIZE = 64 * 1024
+# Allowance for the form fields sent alongside the resume
+MAX_REQUEST_SIZE = MAX_FILE_SIZE + 64 * 1024
+
+class RequestSizeLimitMiddleware:
+    """
+    Reject requests whose Content-Length exceeds max_size before the body is read
+    Starlette spools the whole multipart body while parsing the form, before the
+    endpoint runs; this keeps oversized uploads from being received at all.
+    Chunked requests carry no Content-Length and are left to process_resume's checks.
+    """
+
+    def __init__(self, app, max_size: int):
+        self.app = app
+        self.max_size = max_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http":
+            content_length = dict(scope["headers"]).get(b"content-length", b"")
+            if content_length.isdigit() and int(content_length) > self.max_size:
+                response = ORJSONResponse(
+                    {"detail": f"Request too large. Max file size is {MAX_FILE_SIZE / (1024 * 1024):g}MB"},
+                    status_code=413
+                )
+                await response(scope, receive, send)
+                return
+        await self.app(scope, receive, send)
+
+app.add_middleware(RequestSizeLimitMiddleware, max_size=MAX_REQUEST_SIZE)
+
 def extract_text_from_pdf(file_content: bytes) -> str:
-    """Extract text from PDF file"""
+    """Extract text from PDF file (first MAX_RESUME_PAGES pages only)"""
     try:
         pdf_reader = PdfReader(BytesIO(file_content))
-        text = ""
-        for page in pdf_reader.pages:
-            text += page.extract_text() + "\n"
-        return text
+        return "\n".join(page.extract_text() or "" for page in pdf_reader.pages[:MAX_RESUME_PAGES])
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Error reading PDF: {str(e)}")
 
@@ -111,13 +222,16 @@ def extract_text_from_file(filename: str, content: bytes) -> str:
     else:
         raise HTTPException(status_code=400, detail="Unsupported file type")
 
-def generate_career_plan(user_profile: UserProfile, resume_text: Optional[str] = None) -> str:
-    """
-    Generate personalized AI career path using Azure OpenAI GPT-4o
-    Implements retry logic and proper error handling as per Azure best practices
-    """
-    client = get_azure_openai_client()
-    
+# Output budget for a plan; a plan cut off at the limit is requested once more with the larger budget
+PLAN_MAX_TOKENS = 1500
+PLAN_RETRY_MAX_TOKENS = 4000
+
+def build_plan_request(
+    user_profile: UserProfile,
+    resume_text: Optional[str] = None,
+    max_tokens: int = PLAN_MAX_TOKENS
+) -> dict:
+    """Build the chat completion arguments for a career plan request"""
     # Build comprehensive prompt
     prompt = f"""You are an expert AI career advisor. Based on the following information about the user, create a comprehensive, personalized learning path to help them become a "Tech Freak in AI".
 
@@ -134,174 +248,418 @@ User Profile:
 """
 
     if resume_text:
-        prompt += f"\nResume/CV Summary:\n{resume_text[:2000]}\n"
+        prompt += f"\nResume/CV Summary:\n{resume_text[:MAX_RESUME_CHARS]}\n"
 
     prompt += """
-Create a detailed, actionable learning plan in HTML format. The plan should include:
-
-1. **Executive Summary**: Brief overview tailored to their background
-2. **Skill Gap Analysis**: What they need to learn based on current level
-3. **Learning Roadmap**: Structured in phases (Beginner/Intermediate/Advanced if applicable)
-4. **Recommended Resources**: Specific courses, books, projects
-5. **Timeline**: Realistic timeframes based on their time commitment
-6. **Project Ideas**: Hands-on projects to build portfolio
-7. **Career Opportunities**: Potential roles they can target
-8. **Next Steps**: Immediate actions to take
-
-Make it motivating, specific, and actionable. Use modern HTML with inline CSS for beautiful formatting. 
-Use a professional color scheme with:
-- Primary color: #6366f1 (indigo)
-- Secondary color: #8b5cf6 (purple)
-- Accent color: #ec4899 (pink)
-- Background: #f8fafc
-- Text: #1e293b
-
-Include proper headings, lists, cards, and sections. Make it visually appealing and easy to read.
-Do NOT include <html>, <head>, or <body> tags - just the content div that will be inserted into the page.
+Create a detailed, actionable learning plan. The plan should include these sections, in order:
+
+1. Skill Gap Analysis: What they need to learn based on current level
+2. Learning Roadmap: Structured in phases (Beginner/Intermediate/Advanced if applicable)
+3. Recommended Resources: Specific courses, books, projects
+4. Timeline: Realistic timeframes based on their time commitment
+5. Project Ideas: Hands-on projects to build portfolio
+6. Career Opportunities: Potential roles they can target
+7. Next Steps: Immediate actions to take
+
+Make it motivating, specific, and actionable. Keep each item to one or two sentences.
+
+Respond with a JSON object matching this schema, and nothing else:
+{
+  "executive_summary": "Brief overview tailored to their background",
+  "sections": [
+    {
+      "title": "Section title",
+      "summary": "One or two sentence introduction to the section",
+      "items": ["Specific, actionable point", "..."]
+    }
+  ]
+}
 """
 
+    return {
+        "model": os.getenv("AZURE_OPENAI_DEPLOYMENT_NAME", "gpt-4o"),
+        "messages": [
+            {"role": "system", "content": "You are an expert AI career advisor who creates personalized, actionable learning plans. You always respond with valid JSON."},
+            {"role": "user", "content": prompt}
+        ],
+        "temperature": 0.7,
+        "max_tokens": max_tokens,
+        "response_format": {"type": "json_object"}
+    }
+
+# The model returns structured JSON; styling lives here instead of in generated tokens
+_PLAN_TEMPLATE = Environment(autoescape=True, trim_blocks=True, lstrip_blocks=True).from_string("""\
+<div style="color: #1e293b; line-height: 1.6;">
+    <div class="card" style="background-color: #f8fafc; border: 1px solid #e2e8f0; border-left: 4px solid #6366f1; border-radius: 8px; padding: 16px; margin-bottom: 20px;">
+        <h2 style="color: #6366f1; margin-top: 0;">Executive Summary</h2>
+        <p>{{ executive_summary }}</p>
+    </div>
+    {% for section in sections %}
+    <div class="card" style="background-color: #f8fafc; border: 1px solid #e2e8f0; border-radius: 8px; padding: 16px; margin-bottom: 20px;">
+        <h2 style="color: #8b5cf6; margin-top: 0;">{{ section.title }}</h2>
+        {% if section.summary %}<p>{{ section.summary }}</p>{% endif %}
+        {% if section.points %}
+        <ul style="margin-left: 20px; list-style-type: disc;">
+            {% for point in section.points %}
+            <li style="margin-bottom: 6px;">{{ point }}</li>
+            {% endfor %}
+        </ul>
+        {% endif %}
+    </div>
+    {% endfor %}
+</div>
+""")
+
+def _plan_text(value) -> str:
+    """A plan field as text; anything that is not a string (null, numbers, objects) renders empty"""
+    return value if isinstance(value, str) else ""
+
+def _plan_points(items) -> list:
+    """Section items as a list of strings; a bare string is a single point"""
+    if isinstance(items, str):
+        return [items]
+    if isinstance(items, list):
+        return [item for item in items if isinstance(item, str)]
+    return []
+
+def render_plan_html(plan_json: str) -> str:
+    """
+    Render the model's JSON plan into the HTML shown on the page and in the PDF
+    Raises ValueError if plan_json is not a JSON object; fields of the wrong type are dropped
+    """
+    plan = json.loads(plan_json)
+    if not isinstance(plan, dict):
+        raise ValueError("Plan must be a JSON object")
+    sections = plan.get("sections")
+    sections = [
+        {
+            "title": _plan_text(section.get("title")),
+            "summary": _plan_text(section.get("summary")),
+            "points": _plan_points(section.get("items"))
+        }
+        for section in (sections if isinstance(sections, list) else []) if isinstance(section, dict)
+    ]
+    return _PLAN_TEMPLATE.render(
+        executive_summary=_plan_text(plan.get("executive_summary")),
+        sections=sections
+    )
+
+async def request_untruncated_plan(plan_request: dict) -> str:
+    """
+    Repeat a plan request that hit its token limit with PLAN_RETRY_MAX_TOKENS
+    Truncated JSON cannot be parsed, so a plan that is still cut off raises ValueError
+    """
+    logger.warning(f"Plan hit the {plan_request['max_tokens']} token limit; retrying with {PLAN_RETRY_MAX_TOKENS}")
+    client = get_azure_openai_client()
+    response = await client.chat.completions.create(**{**plan_request, "max_tokens": PLAN_RETRY_MAX_TOKENS})
+    choice = response.choices[0]
+    if choice.finish_reason == "length":
+        raise ValueError(f"Plan did not fit in {PLAN_RETRY_MAX_TOKENS} tokens")
+    return choice.message.content
+
+async def generate_career_plan(user_profile: UserProfile, resume_text: Optional[str] = None) -> str:
+    """
+    Generate personalized AI career path using Azure OpenAI GPT-4o
+    Implements retry logic and proper error handling as per Azure best practices
+    """
+    # Identical inputs produce the same prompt, so serve repeats from the cache
+    cache_key = PlanCache.make_key(user_profile.model_dump(), resume_text)
+    cached_plan = plan_cache.get(cache_key)
+    if cached_plan is not None:
+        logger.info("Serving career plan from cache")
+        return cached_plan
+    
+    client = get_azure_openai_client()
+    
     try:
-        # Call Azure OpenAI with retry logic
-        response = client.chat.completions.create(
-            model=os.getenv("AZURE_OPENAI_DEPLOYMENT_NAME", "gpt-4o"),
-            messages=[
-                {"role": "system", "content": "You are an expert AI career advisor who creates personalized, actionable learning plans."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.7,
-            max_tokens=4000
-        )
+        # Call Azure OpenAI (async so the event loop keeps serving other requests)
+        plan_request = build_plan_request(user_profile, resume_text)
+        response = await client.chat.completions.create(**plan_request)
         
-        html_plan = response.choices[0].message.content
+        choice = response.choices[0]
+        plan_json = choice.message.content
+        if choice.finish_reason == "length":
+            plan_json = await request_untruncated_plan(plan_request)
+        
+        html_plan = render_plan_html(plan_json)
+        plan_cache.set(cache_key, html_plan)
         return html_plan
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error generating plan with Azure OpenAI: {str(e)}")
 
-async def create_pdf_from_html(html_content: str, filename: str) -> str:
+def sse_event(payload: dict) -> str:
+    """Format a payload as a Server-Sent Events message"""
+    return f"data: {json.dumps(payload)}\n\n"
+
+async def stream_career_plan(user_profile: UserProfile, resume_text: Optional[str] = None):
+    """
+    Stream a career plan from Azure OpenAI as Server-Sent Events
+    Yields {"delta": ...} messages with the raw JSON as it is generated, then
+    {"done": true, "html_plan": ..., "user_profile": ...} with the rendered plan.
+    If the stream is cut off at the token limit, the done message carries the
+    plan from a retry with a larger budget instead.
+    """
+    cache_key = PlanCache.make_key(user_profile.model_dump(), resume_text)
+    html_plan = plan_cache.get(cache_key)
+    
+    if html_plan is not None:
+        logger.info("Serving career plan from cache")
+    else:
+        client = get_azure_openai_client()
+        plan_request = build_plan_request(user_profile, resume_text)
+        parts = []
+        finish_reason = None
+        try:
+            stream = await client.chat.completions.create(**plan_request, stream=True)
+            async for chunk in stream:
+                # Azure sends content filter results in chunks without choices
+                if not chunk.choices:
+                    continue
+                finish_reason = chunk.choices[0].finish_reason or finish_reason
+                delta = chunk.choices[0].delta.content or ""
+                if delta:
+                    parts.append(delta)
+                    yield sse_event({"delta": delta})
+            
+            plan_json = "".join(parts)
+            if finish_reason == "length":
+                plan_json = await request_untruncated_plan(plan_request)
+            html_plan = render_plan_html(plan_json)
+        except Exception as e:
+            logger.error(f"Error streaming plan from Azure OpenAI: {str(e)}")
+            yield sse_event({"error": f"Error generating plan with Azure OpenAI: {str(e)}"})
+            return
+        
+        plan_cache.set(cache_key, html_plan)
+    
+    yield sse_event({"done": True, "html_plan": html_plan, "user_profile": user_profile.model_dump()})
+
+async def save_resume(content: bytes, safe_filename: str):
+    """Save uploaded resume to storage; failures are logged so plan generation can continue"""
+    try:
+        await storage_manager.save_file(content, safe_filename, "uploads")
+        logger.info(f"Resume saved: {safe_filename}")
+    except Exception as e:
+        logger.error(f"Error saving resume {safe_filename}: {str(e)}")
+
+def build_user_profile(
+    experience_level: str,
+    job_role: str,
+    interests: str,
+    learning_style: str,
+    time_commitment: str,
+    goals: str,
+    current_skills: str = "",
+    preferred_technologies: str = ""
+) -> UserProfile:
+    """Create a UserProfile from the submitted form fields"""
+    # Parse interests
+    interests_list = [i for i in _INTEREST_SPLIT.split(interests.strip()) if i]
+    
+    return UserProfile(
+        experience_level=experience_level,
+        job_role=job_role,
+        interests=interests_list,
+        learning_style=learning_style,
+        time_commitment=time_commitment,
+        goals=goals,
+        current_skills=current_skills,
+        preferred_technologies=preferred_technologies
+    )
+
+async def process_resume(resume: Optional[UploadFile]) -> Optional[str]:
+    """
+    Validate, store and extract text from an uploaded resume
+    Returns at most MAX_RESUME_CHARS characters, or None if no resume was sent
+    """
+    if not resume or not resume.filename:
+        return None
+    
+    # Validate file type before reading any content
+    extension = os.path.splitext(resume.filename)[1].lower()
+    if extension not in ALLOWED_FILE_TYPES:
+        raise HTTPException(status_code=415, detail="Unsupported file type")
+    
+    # Validate file size; the form parser has already spooled the upload, so reading it
+    # in chunks only caps how much is copied into memory here
+    too_large = HTTPException(
+        status_code=413,
+        detail=f"File too large. Max size is {MAX_FILE_SIZE / (1024 * 1024):g}MB"
+    )
+    if resume.size is not None and resume.size > MAX_FILE_SIZE:
+        raise too_large
+    
+    chunks = []
+    total_size = 0
+    while chunk := await resume.read(UPLOAD_CHUNK_SIZE):
+        total_size += len(chunk)
+        if total_size > MAX_FILE_SIZE:
+            raise too_large
+        chunks.append(chunk)
+    content = b"".join(chunks)
+    del chunks
+    
+    # Save resume to storage (Azure Blob or local)
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    # Replace path separators and any other unsafe characters
+    safe_filename = f"{timestamp}_{_UNSAFE_FILENAME_CHARS.sub('_', resume.filename)}"
+    upload_task = asyncio.create_task(save_resume(content, safe_filename))
+    
+    # Extract text from resume while the upload runs (CPU-bound, so run it in a worker thread)
+    try:
+        resume_text = await asyncio.to_thread(extract_text_from_file, resume.filename, content)
+    finally:
+        await upload_task
+    
+    # Only the first MAX_RESUME_CHARS characters reach the prompt; drop the rest now
+    return resume_text[:MAX_RESUME_CHARS]
+
+# Static PDF stylesheet and document head, built once at import so only the body is interpolated per request
+_PDF_STYLES = """
+        @page {
+            size: A4;
+            margin: 2cm;
+        }
+        body {
+            font-family: Arial, Helvetica, sans-serif;
+            line-height: 1.6;
+            color: #1e293b;
+            background-color: #ffffff;
+        }
+        h1, h2, h3, h4, h5, h6 {
+            color: #1e293b;
+            margin-top: 1em;
+            margin-bottom: 0.5em;
+        }
+        h1 {
+            color: #6366f1;
+            font-size: 24px;
+            border-bottom: 3px solid #6366f1;
+            padding-bottom: 10px;
+        }
+        h2 {
+            color: #8b5cf6;
+            font-size: 20px;
+            border-bottom: 2px solid #8b5cf6;
+            padding-bottom: 8px;
+        }
+        h3 {
+            color: #ec4899;
+            font-size: 18px;
+        }
+        ul, ol {
+            margin-left: 20px;
+            margin-bottom: 1em;
+        }
+        li {
+            margin-bottom: 0.5em;
+        }
+        p {
+            margin-bottom: 1em;
+        }
+        .card {
+            border: 1px solid #e2e8f0;
+            border-radius: 8px;
+            padding: 15px;
+            margin-bottom: 15px;
+            background-color: #f8fafc;
+        }
+        .badge {
+            display: inline-block;
+            padding: 4px 12px;
+            border-radius: 12px;
+            background-color: #e0e7ff;
+            color: #4338ca;
+            font-size: 12px;
+            margin-right: 5px;
+            margin-bottom: 5px;
+        }
+        strong {
+            color: #0f172a;
+        }
+        em {
+            color: #475569;
+        }
+        code {
+            background-color: #f1f5f9;
+            padding: 2px 6px;
+            border-radius: 4px;
+            font-family: monospace;
+            font-size: 0.9em;
+        }
+        blockquote {
+            border-left: 4px solid #6366f1;
+            padding-left: 15px;
+            margin-left: 0;
+            color: #64748b;
+            font-style: italic;
+        }
+        table {
+            width: 100%;
+            border-collapse: collapse;
+            margin-bottom: 1em;
+        }
+        th, td {
+            border: 1px solid #e2e8f0;
+            padding: 8px;
+            text-align: left;
+        }
+        th {
+            background-color: #f1f5f9;
+            font-weight: bold;
+        }
+        .header {
+            text-align: center;
+            margin-bottom: 30px;
+            padding-bottom: 20px;
+            border-bottom: 3px solid #6366f1;
+        }
+        .header h1 {
+            color: #6366f1;
+            font-size: 28px;
+            margin-bottom: 10px;
+            border-bottom: none;
+        }
+        .header p {
+            color: #64748b;
+            font-size: 14px;
+        }
+"""
+_PDF_HEAD = '<!DOCTYPE html>\n<html>\n<head>\n    <meta charset="UTF-8">\n'
+# xhtml2pdf only understands inline <style> blocks
+_PDF_HEAD_BYTES = f"{_PDF_HEAD}    <style>{_PDF_STYLES}    </style>\n</head>".encode('utf-8')
+# WeasyPrint takes a pre-parsed stylesheet, so the CSS is parsed once per process
+_PDF_CSS = CSS(string=_PDF_STYLES) if CSS is not None else None
+
+def render_pdf(html_body: str) -> bytes:
+    """
+    Render the PDF document (CPU-bound, call from a worker thread)
+    Uses WeasyPrint when available, xhtml2pdf otherwise
+    """
+    if _PDF_CSS is not None:
+        return HTML(string=f"{_PDF_HEAD}</head>{html_body}").write_pdf(stylesheets=[_PDF_CSS])
+
+    pdf_buffer = BytesIO()
+    pisa_status = pisa.CreatePDF(
+        BytesIO(_PDF_HEAD_BYTES + html_body.encode('utf-8')),
+        dest=pdf_buffer,
+        encoding='utf-8'
+    )
+    
+    if pisa_status.err:
+        raise Exception("Error during PDF generation")
+    
+    return pdf_buffer.getvalue()
+
+async def create_pdf_from_html(html_content: str) -> bytes:
     """
     Generate PDF from HTML content preserving all formatting
-    Saves to Azure Blob Storage or local filesystem
-    Returns the file path or blob URL of generated PDF
+    Returns the PDF content as bytes
     """
     try:
-        # Create complete HTML document with styling
-        html_template = f"""
-        <!DOCTYPE html>
-        <html>
-        <head>
-            <meta charset="UTF-8">
-            <style>
-                @page {{
-                    size: A4;
-                    margin: 2cm;
-                }}
-                body {{
-                    font-family: Arial, Helvetica, sans-serif;
-                    line-height: 1.6;
-                    color: #1e293b;
-                    background-color: #ffffff;
-                }}
-                h1, h2, h3, h4, h5, h6 {{
-                    color: #1e293b;
-                    margin-top: 1em;
-                    margin-bottom: 0.5em;
-                }}
-                h1 {{
-                    color: #6366f1;
-                    font-size: 24px;
-                    border-bottom: 3px solid #6366f1;
-                    padding-bottom: 10px;
-                }}
-                h2 {{
-                    color: #8b5cf6;
-                    font-size: 20px;
-                    border-bottom: 2px solid #8b5cf6;
-                    padding-bottom: 8px;
-                }}
-                h3 {{
-                    color: #ec4899;
-                    font-size: 18px;
-                }}
-                ul, ol {{
-                    margin-left: 20px;
-                    margin-bottom: 1em;
-                }}
-                li {{
-                    margin-bottom: 0.5em;
-                }}
-                p {{
-                    margin-bottom: 1em;
-                }}
-                .card {{
-                    border: 1px solid #e2e8f0;
-                    border-radius: 8px;
-                    padding: 15px;
-                    margin-bottom: 15px;
-                    background-color: #f8fafc;
-                }}
-                .badge {{
-                    display: inline-block;
-                    padding: 4px 12px;
-                    border-radius: 12px;
-                    background-color: #e0e7ff;
-                    color: #4338ca;
-                    font-size: 12px;
-                    margin-right: 5px;
-                    margin-bottom: 5px;
-                }}
-                strong {{
-                    color: #0f172a;
-                }}
-                em {{
-                    color: #475569;
-                }}
-                code {{
-                    background-color: #f1f5f9;
-                    padding: 2px 6px;
-                    border-radius: 4px;
-                    font-family: monospace;
-                    font-size: 0.9em;
-                }}
-                blockquote {{
-                    border-left: 4px solid #6366f1;
-                    padding-left: 15px;
-                    margin-left: 0;
-                    color: #64748b;
-                    font-style: italic;
-                }}
-                table {{
-                    width: 100%;
-                    border-collapse: collapse;
-                    margin-bottom: 1em;
-                }}
-                th, td {{
-                    border: 1px solid #e2e8f0;
-                    padding: 8px;
-                    text-align: left;
-                }}
-                th {{
-                    background-color: #f1f5f9;
-                    font-weight: bold;
-                }}
-                .header {{
-                    text-align: center;
-                    margin-bottom: 30px;
-                    padding-bottom: 20px;
-                    border-bottom: 3px solid #6366f1;
-                }}
-                .header h1 {{
-                    color: #6366f1;
-                    font-size: 28px;
-                    margin-bottom: 10px;
-                    border-bottom: none;
-                }}
-                .header p {{
-                    color: #64748b;
-                    font-size: 14px;
-                }}
-            </style>
-        </head>
+        # Only the timestamp and plan content vary per request
+        html_body = f"""
         <body>
             <div class="header">
                 <h1>🤖 AI Tech Career Path Plan</h1>
@@ -314,35 +672,37 @@ async def create_pdf_from_html(html_content: str, filename: str) -> str:
         </html>
         """
         
-        # Convert HTML to PDF in memory
-        pdf_buffer = BytesIO()
-        pisa_status = pisa.CreatePDF(
-            BytesIO(html_template.encode('utf-8')),
-            dest=pdf_buffer,
-            encoding='utf-8'
-        )
-        
-        if pisa_status.err:
-            raise Exception("Error during PDF generation")
-        
-        # Save PDF to Azure Blob Storage or local filesystem
-        pdf_content = pdf_buffer.getvalue()
-        file_path = await storage_manager.save_file(pdf_content, filename, "generated")
-        
-        return file_path
+        # Convert HTML to PDF in memory (CPU-bound, so run it in a worker thread)
+        return await asyncio.to_thread(render_pdf, html_body)
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error generating PDF: {str(e)}")
 
+# Lifecycle events
+@app.on_event("startup")
+async def initialize_storage():
+    """Create Azure Blob containers once per process instead of on first request"""
+    await storage_manager.initialize()
+
+@app.on_event("shutdown")
+async def close_azure_http_client():
+    """Release pooled Azure OpenAI connections"""
+    await close_azure_openai_client()
+
+@app.on_event("shutdown")
+async def close_storage_client():
+    """Release pooled Azure Blob Storage connections"""
+    await storage_manager.close()
+
 # API Endpoints
-@app.get("/", response_class=HTMLResponse)
-async def root():
-    """Serve the main HTML page"""
+# Landing page, read once at import instead of on every request
+def load_index_html() -> bytes:
+    """Read static/index.html, or return a placeholder page if it is missing"""
     try:
-        with open("static/index.html", "r", encoding="utf-8") as f:
+        with open("static/index.html", "rb") as f:
             return f.read()
     except FileNotFoundError:
-        return """
+        return b"""
         <html>
             <body>
                 <h1>AI Tech Career Path Finder</h1>
@@ -351,6 +711,32 @@ async def root():
         </html>
         """
 
+_INDEX_HTML = load_index_html()
+_INDEX_HEADERS = {
+    "Cache-Control": "public, max-age=300",
+    "ETag": f'"{hashlib.blake2b(_INDEX_HTML, digest_size=16).hexdigest()}"'
+}
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Weak comparison of an If-None-Match header against our strong ETag (RFC 9110)
+    Accepts "*", comma-separated lists and W/-prefixed validators
+    """
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == etag:
+            return True
+    return False
+
+@app.get("/", response_class=HTMLResponse)
+async def root(request: Request):
+    """Serve the main HTML page"""
+    if etag_matches(request.headers.get("if-none-match"), _INDEX_HEADERS["ETag"]):
+        return Response(status_code=304, headers=_INDEX_HEADERS)
+    return HTMLResponse(_INDEX_HTML, headers=_INDEX_HEADERS)
+
 @app.post("/api/generate-plan")
 async def generate_plan(
     experience_level: str = Form(...),
@@ -368,81 +754,75 @@ async def generate_plan(
     Accepts form data and optional resume file
     """
     
-    # Parse interests
-    interests_list = [i.strip() for i in interests.split(',') if i.strip()]
-    
-    # Create user profile
-    user_profile = UserProfile(
-        experience_level=experience_level,
-        job_role=job_role,
-        interests=interests_list,
-        learning_style=learning_style,
-        time_commitment=time_commitment,
-        goals=goals,
-        current_skills=current_skills,
-        preferred_technologies=preferred_technologies
+    user_profile = build_user_profile(
+        experience_level, job_role, interests, learning_style,
+        time_commitment, goals, current_skills, preferred_technologies
     )
-    
-    # Process resume if provided
-    resume_text = None
-    if resume and resume.filename:
-        # Validate file size (10MB max)
-        content = await resume.read()
-        if len(content) > 10 * 1024 * 1024:
-            raise HTTPException(status_code=400, detail="File too large. Max size is 10MB")
-        
-        # Save resume to storage (Azure Blob or local)
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        safe_filename = f"{timestamp}_{resume.filename}"
-        await storage_manager.save_file(content, safe_filename, "uploads")
-        logger.info(f"Resume saved: {safe_filename}")
-        
-        # Extract text from resume
-        resume_text = extract_text_from_file(resume.filename, content)
+    resume_text = await process_resume(resume)
     
     # Generate plan using Azure OpenAI
-    html_plan = generate_career_plan(user_profile, resume_text)
+    html_plan = await generate_career_plan(user_profile, resume_text)
     
-    return JSONResponse({
+    return ORJSONResponse({
         "success": True,
         "html_plan": html_plan,
         "user_profile": user_profile.model_dump()
     })
 
+@app.post("/api/generate-plan/stream")
+async def generate_plan_stream(
+    experience_level: str = Form(...),
+    job_role: str = Form(...),
+    interests: str = Form(...),
+    learning_style: str = Form(...),
+    time_commitment: str = Form(...),
+    goals: str = Form(...),
+    current_skills: str = Form(""),
+    preferred_technologies: str = Form(""),
+    resume: Optional[UploadFile] = File(None)
+):
+    """
+    Generate personalized AI career plan, streamed as Server-Sent Events
+    Accepts the same form data as /api/generate-plan
+    """
+    user_profile = build_user_profile(
+        experience_level, job_role, interests, learning_style,
+        time_commitment, goals, current_skills, preferred_technologies
+    )
+    resume_text = await process_resume(resume)
+    
+    # Surface configuration errors as a normal HTTP error before the stream starts
+    get_azure_openai_client()
+    
+    return StreamingResponse(
+        stream_career_plan(user_profile, resume_text),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @app.post("/api/download-pdf")
-async def download_pdf(plan: CareerPlan):
+async def download_pdf(plan: CareerPlan, background_tasks: BackgroundTasks):
     """
     Generate and download PDF version of the career plan
-    Saves to Azure Blob Storage or local filesystem
+    The PDF is returned straight from memory; the copy in Azure Blob Storage
+    or the local filesystem is saved after the response has been sent
     """
     
     # Generate unique filename
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     filename = f"ai_career_plan_{timestamp}.pdf"
     
-    # Create PDF and save to storage
-    pdf_path = await create_pdf_from_html(plan.html_plan, filename)
+    # Create PDF in memory
+    pdf_content = await create_pdf_from_html(plan.html_plan)
     
-    # If using Azure Blob Storage, download the file temporarily for response
-    if storage_manager.use_azure:
-        # Get the PDF content from Azure Blob
-        pdf_content = await storage_manager.get_file(filename, "generated")
-        if pdf_content:
-            return JSONResponse({
-                "success": True,
-                "filename": filename,
-                "download_url": pdf_path,  # This is the blob URL
-                "message": "PDF generated successfully"
-            })
-        else:
-            raise HTTPException(status_code=500, detail="Failed to retrieve generated PDF")
-    else:
-        # For local storage, return file directly
-        return FileResponse(
-            pdf_path,
-            media_type="application/pdf",
-            filename=filename
-        )
+    # Save to storage (Azure Blob or local) without delaying the download
+    background_tasks.add_task(storage_manager.save_file, pdf_content, filename, "generated")
+    
+    return Response(
+        content=pdf_content,
+        media_type="application/pdf",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
 
 @app.get("/health")
 async def health_check():
@@ -451,4 +831,14 @@ async def health_check():
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    # One process per CPU; clients and caches are created per worker.
+    # "auto" selects uvloop and httptools (installed by uvicorn[standard]) and
+    # falls back to asyncio/h11 where they are unavailable, e.g. on Windows.
+    uvicorn.run(
+        "main:app",
+        host="0.0.0.0",
+        port=8000,
+        workers=int(os.getenv("WORKERS", os.cpu_count() or 1)),
+        loop="auto",
+        http="auto"
+    )
@@ -4,15 +4,19 @@ Handles uploads and generated files storage
 """
 
 import os
+import asyncio
 from typing import Optional
-from azure.storage.blob import BlobServiceClient, BlobClient, ContainerClient
-from azure.identity import DefaultAzureCredential
-from io import BytesIO
+from azure.core.exceptions import ResourceExistsError
+from azure.storage.blob.aio import BlobServiceClient
+from azure.identity.aio import DefaultAzureCredential
 import logging
 
 logger = logging.getLogger(__name__)
 
 
+CONTAINERS = ("uploads", "generated")
+
+
 class AzureStorageManager:
     """
     Manages file storage using Azure Blob Storage
@@ -22,6 +26,9 @@ class AzureStorageManager:
     def __init__(self):
         self.use_azure = False
         self.blob_service_client = None
+        self._credential = None
+        self._containers = {}
+        self._containers_ready = False
         self.storage_account_name = os.getenv("AZURE_STORAGE_ACCOUNT_NAME")
         self.storage_connection_string = os.getenv("AZURE_STORAGE_CONNECTION_STRING")
         self.use_managed_identity = os.getenv("USE_MANAGED_IDENTITY", "false").lower() == "true"
@@ -40,8 +47,8 @@ class AzureStorageManager:
                 # Use Managed Identity (recommended for production)
                 logger.info("Initializing Azure Storage with Managed Identity")
                 account_url = f"https://{self.storage_account_name}.blob.core.windows.net"
-                credential = DefaultAzureCredential()
-                self.blob_service_client = BlobServiceClient(account_url, credential=credential)
+                self._credential = DefaultAzureCredential()
+                self.blob_service_client = BlobServiceClient(account_url, credential=self._credential)
             elif self.storage_connection_string:
                 # Use Connection String (for development/testing)
                 logger.info("Initializing Azure Storage with Connection String")
@@ -53,8 +60,12 @@ class AzureStorageManager:
                 self._ensure_local_directories()
                 return
             
-            # Create containers if they don't exist
-            self._ensure_containers()
+            # Build container clients once; blob clients derived from them are cheap
+            self._containers = {
+                name: self.blob_service_client.get_container_client(name) for name in CONTAINERS
+            }
+            
+            # Containers are created on first use, since that needs a running event loop
             self.use_azure = True
             logger.info("Azure Blob Storage initialized successfully")
             
@@ -63,17 +74,36 @@ class AzureStorageManager:
             logger.info("Falling back to local filesystem")
             self._ensure_local_directories()
     
-    def _ensure_containers(self):
-        """Ensure required containers exist"""
-        containers = ["uploads", "generated"]
-        for container_name in containers:
+    async def initialize(self):
+        """
+        One-shot startup initialization (call from the app startup event)
+        Blob operations also run it lazily, so calling it is optional
+        """
+        if self.use_azure:
+            await self._ensure_containers()
+    
+    async def _ensure_containers(self):
+        """Ensure required containers exist (runs once per process)"""
+        if self._containers_ready:
+            return
+        for container_name in CONTAINERS:
             try:
-                container_client = self.blob_service_client.get_container_client(container_name)
-                if not container_client.exists():
-                    container_client.create_container()
-                    logger.info(f"Created container: {container_name}")
+                # One request per container: create it and treat "already exists" as success
+                await self._containers[container_name].create_container()
+                logger.info(f"Created container: {container_name}")
+            except ResourceExistsError:
+                pass
             except Exception as e:
                 logger.error(f"Error creating container {container_name}: {str(e)}")
+        self._containers_ready = True
+    
+    def _get_blob_client(self, filename: str, folder: str):
+        """Get a blob client from the cached container client for the folder"""
+        container_client = self._containers.get(folder)
+        if container_client is None:
+            container_client = self.blob_service_client.get_container_client(folder)
+            self._containers[folder] = container_client
+        return container_client.get_blob_client(filename)
     
     def _ensure_local_directories(self):
         """Ensure local directories exist for fallback storage"""
@@ -95,11 +125,9 @@ class AzureStorageManager:
         if self.use_azure:
             try:
                 # Upload to Azure Blob Storage
-                blob_client = self.blob_service_client.get_blob_client(
-                    container=folder,
-                    blob=filename
-                )
-                blob_client.upload_blob(file_content, overwrite=True)
+                await self._ensure_containers()
+                blob_client = self._get_blob_client(filename, folder)
+                await blob_client.upload_blob(file_content, overwrite=True)
                 blob_url = blob_client.url
                 logger.info(f"File saved to Azure Blob: {blob_url}")
                 return blob_url
@@ -107,9 +135,9 @@ class AzureStorageManager:
             except Exception as e:
                 logger.error(f"Error uploading to Azure Blob: {str(e)}")
                 logger.info("Falling back to local storage")
-                return self._save_local(file_content, filename, folder)
+                return await asyncio.to_thread(self._save_local, file_content, filename, folder)
         else:
-            return self._save_local(file_content, filename, folder)
+            return await asyncio.to_thread(self._save_local, file_content, filename, folder)
     
     def _save_local(self, file_content: bytes, filename: str, folder: str) -> str:
         """Save file to local filesystem"""
@@ -132,18 +160,16 @@ class AzureStorageManager:
         """
         if self.use_azure:
             try:
-                blob_client = self.blob_service_client.get_blob_client(
-                    container=folder,
-                    blob=filename
-                )
-                download_stream = blob_client.download_blob()
-                return download_stream.readall()
+                await self._ensure_containers()
+                blob_client = self._get_blob_client(filename, folder)
+                download_stream = await blob_client.download_blob()
+                return await download_stream.readall()
                 
             except Exception as e:
                 logger.error(f"Error downloading from Azure Blob: {str(e)}")
-                return self._get_local(filename, folder)
+                return await asyncio.to_thread(self._get_local, filename, folder)
         else:
-            return self._get_local(filename, folder)
+            return await asyncio.to_thread(self._get_local, filename, folder)
     
     def _get_local(self, filename: str, folder: str) -> Optional[bytes]:
         """Get file from local filesystem"""
@@ -167,10 +193,7 @@ class AzureStorageManager:
             Local path or Azure blob URL
         """
         if self.use_azure:
-            blob_client = self.blob_service_client.get_blob_client(
-                container=folder,
-                blob=filename
-            )
+            blob_client = self._get_blob_client(filename, folder)
             return blob_client.url
         else:
             return os.path.join(folder, filename)
@@ -188,11 +211,9 @@ class AzureStorageManager:
         """
         if self.use_azure:
             try:
-                blob_client = self.blob_service_client.get_blob_client(
-                    container=folder,
-                    blob=filename
-                )
-                blob_client.delete_blob()
+                await self._ensure_containers()
+                blob_client = self._get_blob_client(filename, folder)
+                await blob_client.delete_blob()
                 logger.info(f"Deleted blob: {folder}/{filename}")
                 return True
             except Exception as e:
@@ -201,12 +222,19 @@ class AzureStorageManager:
         else:
             try:
                 file_path = os.path.join(folder, filename)
-                os.remove(file_path)
+                await asyncio.to_thread(os.remove, file_path)
                 logger.info(f"Deleted local file: {file_path}")
                 return True
             except Exception as e:
                 logger.error(f"Error deleting local file: {str(e)}")
                 return False
+    
+    async def close(self):
+        """Close the Azure Blob Storage client and its connection pool"""
+        if self.blob_service_client is not None:
+            await self.blob_service_client.close()
+        if self._credential is not None:
+            await self._credential.close()
 
 
 # Global storage manager instance
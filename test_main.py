@@ -2,16 +2,115 @@
 Comprehensive tests for AI Tech Career Path Finder
 """
 
+import asyncio
+import hashlib
+import json
+import httpx
 import pytest
-from fastapi.testclient import TestClient
-from main import app, get_azure_openai_client, UserProfile
+import pytest_asyncio
 import os
-from dotenv import load_dotenv
+import re
+from types import MappingProxyType, SimpleNamespace
 
-# Load environment variables
-load_dotenv()
+# Azure OpenAI settings read by the tests; .env is parsed once, by main, when the settings fixture imports it
+_SETTINGS = (
+    'AZURE_OPENAI_ENDPOINT',
+    'AZURE_OPENAI_API_KEY',
+    'AZURE_OPENAI_DEPLOYMENT_NAME',
+    'AZURE_OPENAI_API_VERSION'
+)
 
-client = TestClient(app)
+# INTEGRATION_BATCH=1 (set in the shell, since it is read at collection) runs the integration calls concurrently in test_integration_batch only
+_INTEGRATION_BATCH = os.environ.get('INTEGRATION_BATCH') == '1'
+
+# Requests shared by the individual and batched integration tests
+_HELLO_MESSAGES = [
+    {"role": "system", "content": "You are a helpful assistant."},
+    {"role": "user", "content": "Say 'Hello, Azure OpenAI!' and nothing else."}
+]
+_FORM_DATA = MappingProxyType({
+    "experience_level": "intermediate",
+    "job_role": "Software Developer",
+    "interests": "Machine Learning, Deep Learning",
+    "learning_style": "hands-on",
+    "time_commitment": "10-20-hours",
+    "goals": "Become an AI/ML Engineer and build production ML systems",
+    "current_skills": "Python, JavaScript, SQL",
+    "preferred_technologies": "PyTorch, TensorFlow"
+})
+
+@pytest.fixture(scope="session")
+def app_module():
+    """The main module, imported on first use rather than at collection time"""
+    import main
+    return main
+
+
+@pytest.fixture(scope="session")
+def settings(app_module):
+    """Snapshot of the Azure OpenAI settings, taken once main has loaded .env"""
+    return {name: os.environ.get(name) for name in _SETTINGS}
+
+
+@pytest.fixture(scope="session")
+def event_loop():
+    """One event loop for the session, so async tests can share session-scoped async fixtures"""
+    loop = asyncio.new_event_loop()
+    yield loop
+    loop.close()
+
+
+@pytest_asyncio.fixture(scope="session")
+async def aclient(app_module):
+    """
+    Async HTTP client calling the app in-process through its ASGI interface
+    ASGITransport sends no lifespan events, so the app's startup and shutdown
+    handlers (storage setup, Azure client cleanup) are run around the session here
+    """
+    app = app_module.app
+    transport = httpx.ASGITransport(app=app)
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://testserver") as async_client:
+            yield async_client
+
+
+@pytest.fixture(scope="session")
+def azure_client(app_module):
+    """Azure OpenAI client built once and shared by every test in the session"""
+    return app_module.get_azure_openai_client()
+
+
+@pytest.fixture(scope="session")
+def llm_cache(request, azure_client):
+    """
+    Serve repeated Azure OpenAI requests from .pytest_cache
+    Keyed on the request arguments; run with --no-llm-cache to refresh responses
+    """
+    from openai.types.chat import ChatCompletion
+    
+    cache = getattr(request.config, "cache", None)
+    refresh = request.config.getoption("--no-llm-cache")
+    completions = azure_client.chat.completions
+    original_create = completions.create
+    
+    async def cached_create(**kwargs):
+        if cache is None or kwargs.get("stream"):
+            return await original_create(**kwargs)
+        
+        digest = hashlib.sha256(json.dumps(kwargs, sort_keys=True).encode('utf-8')).hexdigest()
+        key = f"azure_responses/{digest}"
+        cached = None if refresh else cache.get(key, None)
+        if cached is not None:
+            return ChatCompletion.model_validate(cached)
+        
+        response = await original_create(**kwargs)
+        cache.set(key, response.model_dump(mode="json"))
+        return response
+    
+    # The app shares this client, so endpoint tests are served from the cache too
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr(completions, "create", cached_create)
+        yield
 
 
 class TestEnvironmentConfiguration:
@@ -21,80 +120,90 @@ class TestEnvironmentConfiguration:
         """Test that .env file exists"""
         assert os.path.exists('.env'), ".env file not found"
     
-    def test_azure_openai_endpoint_configured(self):
-        """Test Azure OpenAI endpoint is configured"""
-        endpoint = os.getenv('AZURE_OPENAI_ENDPOINT')
-        assert endpoint is not None, "AZURE_OPENAI_ENDPOINT not set"
-        assert endpoint.startswith('https://'), "Endpoint should start with https://"
-        assert 'openai.azure.com' in endpoint, "Should be an Azure OpenAI endpoint"
-    
-    def test_azure_openai_api_key_configured(self):
-        """Test Azure OpenAI API key is configured"""
-        api_key = os.getenv('AZURE_OPENAI_API_KEY')
-        assert api_key is not None, "AZURE_OPENAI_API_KEY not set"
-        assert len(api_key) > 20, "API key seems too short"
-        assert api_key != 'your-api-key-here', "API key not updated from example"
-    
-    def test_azure_openai_deployment_configured(self):
-        """Test Azure OpenAI deployment name is configured"""
-        deployment = os.getenv('AZURE_OPENAI_DEPLOYMENT_NAME')
-        assert deployment is not None, "AZURE_OPENAI_DEPLOYMENT_NAME not set"
-        assert deployment == 'gpt-4o', "Expected deployment name to be gpt-4o"
-    
-    def test_azure_openai_api_version_configured(self):
-        """Test Azure OpenAI API version is configured"""
-        api_version = os.getenv('AZURE_OPENAI_API_VERSION')
-        assert api_version is not None, "AZURE_OPENAI_API_VERSION not set"
+    @pytest.mark.parametrize("var, validator, message", [
+        pytest.param("AZURE_OPENAI_ENDPOINT",
+                     lambda v: v.startswith('https://') and 'openai.azure.com' in v,
+                     "Should be an https:// Azure OpenAI endpoint",
+                     id="endpoint"),
+        pytest.param("AZURE_OPENAI_API_KEY",
+                     lambda v: len(v) > 20 and not v.startswith('your-'),
+                     "API key seems too short or not updated from example",
+                     id="api_key"),
+        pytest.param("AZURE_OPENAI_DEPLOYMENT_NAME",
+                     lambda v: v == 'gpt-4o',
+                     "Expected deployment name to be gpt-4o",
+                     id="deployment"),
+        pytest.param("AZURE_OPENAI_API_VERSION",
+                     lambda v: re.fullmatch(r"\d{4}-\d{2}-\d{2}(-preview)?", v) is not None,
+                     "Expected an API version like 2024-02-15-preview",
+                     id="api_version"),
+    ])
+    def test_azure_openai_setting_configured(self, settings, var, validator, message):
+        """Test each Azure OpenAI setting is present and valid"""
+        value = settings[var]
+        assert value is not None, f"{var} not set"
+        assert validator(value), message
 
 
 class TestAzureOpenAIConnection:
     """Test Azure OpenAI client initialization and connection"""
     
-    def test_azure_client_initialization(self):
+    def test_azure_client_initialization(self, azure_client):
         """Test that Azure OpenAI client can be initialized"""
-        try:
-            client = get_azure_openai_client()
-            assert client is not None, "Azure OpenAI client should not be None"
-        except Exception as e:
-            pytest.fail(f"Failed to initialize Azure OpenAI client: {str(e)}")
+        assert azure_client is not None, "Azure OpenAI client should not be None"
     
-    def test_azure_client_properties(self):
+    def test_azure_client_properties(self, azure_client):
         """Test Azure OpenAI client has correct properties"""
-        client = get_azure_openai_client()
-        assert hasattr(client, 'chat'), "Client should have chat attribute"
-        assert hasattr(client.chat, 'completions'), "Client should have completions attribute"
+        assert hasattr(azure_client, 'chat'), "Client should have chat attribute"
+        assert hasattr(azure_client.chat, 'completions'), "Client should have completions attribute"
 
 
 class TestAPIEndpoints:
     """Test API endpoints"""
     
-    def test_root_endpoint(self):
+    @pytest.mark.asyncio
+    async def test_root_endpoint(self, aclient):
         """Test root endpoint returns HTML"""
-        response = client.get("/")
+        response = await aclient.get("/")
         assert response.status_code == 200
         assert 'text/html' in response.headers['content-type']
         assert 'AI Tech Career Path Finder' in response.text
     
-    def test_health_endpoint(self):
+    @pytest.mark.asyncio
+    async def test_root_endpoint_not_modified(self, aclient):
+        """Test a matching If-None-Match (strong, weak or in a list) gets 304 with no body"""
+        etag = (await aclient.get("/")).headers['etag']
+        for if_none_match in (etag, f"W/{etag}", f'"stale", {etag}'):
+            response = await aclient.get("/", headers={"If-None-Match": if_none_match})
+            assert response.status_code == 304, if_none_match
+            assert response.headers['etag'] == etag
+            assert response.content == b""
+        
+        response = await aclient.get("/", headers={"If-None-Match": '"stale"'})
+        assert response.status_code == 200
+    
+    @pytest.mark.asyncio
+    async def test_health_endpoint(self, aclient):
         """Test health check endpoint"""
-        response = client.get("/health")
+        response = await aclient.get("/health")
         assert response.status_code == 200
         data = response.json()
         assert data['status'] == 'healthy'
         assert 'AI Tech Career Path Finder' in data['service']
     
-    def test_generate_plan_missing_fields(self):
+    @pytest.mark.asyncio
+    async def test_generate_plan_missing_fields(self, aclient):
         """Test generate plan endpoint with missing required fields"""
-        response = client.post("/api/generate-plan", data={})
+        response = await aclient.post("/api/generate-plan", data={})
         assert response.status_code == 422  # Validation error
 
 
 class TestUserProfileModel:
     """Test UserProfile Pydantic model"""
     
-    def test_user_profile_creation(self):
+    def test_user_profile_creation(self, app_module):
         """Test creating a valid UserProfile"""
-        profile = UserProfile(
+        profile = app_module.UserProfile(
             experience_level="intermediate",
             job_role="Software Engineer",
             interests=["Machine Learning", "NLP"],
@@ -105,9 +214,10 @@ class TestUserProfileModel:
         assert profile.experience_level == "intermediate"
         assert len(profile.interests) == 2
     
-    def test_user_profile_optional_fields(self):
+    def test_user_profile_optional_fields(self, app_module):
         """Test UserProfile with optional fields"""
-        profile = UserProfile(
+        # Inputs are known-valid; test_user_profile_creation covers validation
+        profile = app_module.UserProfile.model_construct(
             experience_level="beginner",
             job_role="Student",
             interests=["AI"],
@@ -121,41 +231,304 @@ class TestUserProfileModel:
         assert profile.preferred_technologies == "TensorFlow"
 
 
+def fake_completion(content, finish_reason="stop"):
+    """A minimal non-streamed chat completion"""
+    message = SimpleNamespace(content=content)
+    return SimpleNamespace(choices=[SimpleNamespace(message=message, finish_reason=finish_reason)])
+
+
+def fake_chunk(content, finish_reason=None):
+    """A minimal streamed chat completion chunk"""
+    delta = SimpleNamespace(content=content)
+    return SimpleNamespace(choices=[SimpleNamespace(delta=delta, finish_reason=finish_reason)])
+
+
+async def fake_stream(chunks):
+    """Yield chunks like the stream returned by create(stream=True)"""
+    for chunk in chunks:
+        yield chunk
+
+
+class FakeCompletions:
+    """
+    Stand-in for client.chat.completions that returns (or raises) queued replies in order
+    For stream=True requests the reply is a list of chunks, returned as an async stream
+    """
+
+    def __init__(self):
+        self.calls = []
+        self.replies = []
+
+    async def create(self, **kwargs):
+        self.calls.append(kwargs)
+        reply = self.replies.pop(0)
+        if isinstance(reply, BaseException):
+            raise reply
+        return fake_stream(reply) if kwargs.get("stream") else reply
+
+
+@pytest.fixture
+def fake_completions(app_module, monkeypatch):
+    """Route the app's Azure OpenAI calls to FakeCompletions, with an empty plan cache"""
+    completions = FakeCompletions()
+    fake_client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+    monkeypatch.setattr(app_module, "get_azure_openai_client", lambda: fake_client)
+    monkeypatch.setattr(app_module, "plan_cache", app_module.PlanCache())
+    return completions
+
+
+class TestPlanRendering:
+    """Test rendering the model's JSON plan into HTML"""
+
+    def test_valid_plan(self, app_module):
+        """Test every section, summary and item of a well-formed plan is rendered"""
+        html = app_module.render_plan_html(json.dumps({
+            "executive_summary": "Move into ML engineering",
+            "sections": [
+                {"title": "Skill Gap Analysis", "summary": "Where to start", "items": ["Learn PyTorch", "Study statistics"]},
+                {"title": "Next Steps", "items": ["Enroll in a course"]}
+            ]
+        }))
+        assert "Move into ML engineering" in html
+        assert "Skill Gap Analysis" in html and "Where to start" in html
+        assert html.count("<li") == 3
+        assert "Enroll in a course" in html
+
+    def test_malformed_json_raises(self, app_module):
+        """Test truncated or non-object JSON is rejected rather than rendered"""
+        with pytest.raises(ValueError):
+            app_module.render_plan_html('{"executive_summary": "cut off')
+        with pytest.raises(ValueError):
+            app_module.render_plan_html('["not", "an", "object"]')
+
+    def test_wrong_field_types_are_dropped(self, app_module):
+        """Test fields of the wrong type render nothing instead of their Python repr"""
+        html = app_module.render_plan_html(json.dumps({
+            "executive_summary": None,
+            "sections": [
+                {"title": None, "summary": 987654, "items": "abc"},
+                {"title": "Resources", "items": {"a": 1}},
+                "not a section"
+            ]
+        }))
+        assert "None" not in html and "987654" not in html
+        assert html.count("<li") == 1 and "abc" in html
+        assert "Resources" in html
+
+    def test_plan_text_is_escaped(self, app_module):
+        """Test model output cannot inject markup into the page"""
+        html = app_module.render_plan_html(json.dumps({
+            "executive_summary": "<script>alert(1)</script>",
+            "sections": [{"title": "<b>Title</b>", "items": ["<img src=x onerror=alert(1)>"]}]
+        }))
+        assert "<script>" not in html and "<img" not in html and "<b>" not in html
+        assert "&lt;script&gt;" in html
+
+    @pytest.mark.asyncio
+    async def test_truncated_plan_is_retried(self, app_module, fake_completions):
+        """Test a plan cut off at the token limit is requested again with a larger budget"""
+        fake_completions.replies = [
+            fake_completion('{"executive_summary": "cut', finish_reason="length"),
+            fake_completion('{"executive_summary": "Complete plan", "sections": []}')
+        ]
+        profile = app_module.build_user_profile(
+            "beginner", "Student", "AI", "hands-on", "5-10-hours", "Retry a truncated plan"
+        )
+        html = await app_module.generate_career_plan(profile)
+        assert "Complete plan" in html
+        assert [call["max_tokens"] for call in fake_completions.calls] == [
+            app_module.PLAN_MAX_TOKENS, app_module.PLAN_RETRY_MAX_TOKENS
+        ]
+
+
+def sse_payloads(response):
+    """Decode the JSON payloads of a Server-Sent Events response"""
+    return [json.loads(line[len("data: "):]) for line in response.text.splitlines() if line.startswith("data: ")]
+
+
+class TestPlanStreaming:
+    """Test the Server-Sent Events plan endpoint"""
+
+    _PLAN = '{"executive_summary": "Streamed plan", "sections": [{"title": "Next Steps", "items": ["Start"]}]}'
+
+    @pytest.mark.asyncio
+    async def test_deltas_are_forwarded(self, aclient, fake_completions):
+        """Test each streamed piece is forwarded, followed by the rendered plan"""
+        fake_completions.replies = [[
+            fake_chunk(self._PLAN[:20]),
+            fake_chunk(self._PLAN[20:]),
+            fake_chunk(None, finish_reason="stop")
+        ]]
+        response = await aclient.post("/api/generate-plan/stream", data=_FORM_DATA)
+        assert response.status_code == 200
+        assert 'text/event-stream' in response.headers['content-type']
+        
+        *deltas, done = sse_payloads(response)
+        assert [event["delta"] for event in deltas] == [self._PLAN[:20], self._PLAN[20:]]
+        assert done["done"] is True
+        assert "Streamed plan" in done["html_plan"] and "Next Steps" in done["html_plan"]
+        assert done["user_profile"]["job_role"] == _FORM_DATA["job_role"]
+
+    @pytest.mark.asyncio
+    async def test_cached_plan_sends_only_done(self, app_module, aclient, fake_completions):
+        """Test a cached plan is sent as a single done event without calling the model"""
+        profile = app_module.build_user_profile(**_FORM_DATA)
+        app_module.plan_cache.set(app_module.PlanCache.make_key(profile.model_dump()), "<p>Cached plan</p>")
+        
+        response = await aclient.post("/api/generate-plan/stream", data=_FORM_DATA)
+        [done] = sse_payloads(response)
+        assert done["done"] is True and done["html_plan"] == "<p>Cached plan</p>"
+        assert fake_completions.calls == []
+
+    @pytest.mark.asyncio
+    async def test_truncated_stream_is_retried(self, app_module, aclient, fake_completions):
+        """Test a stream cut off at the token limit is replaced by a retry with a larger budget"""
+        fake_completions.replies = [
+            [fake_chunk('{"executive_summary": "cut'), fake_chunk(None, finish_reason="length")],
+            fake_completion(self._PLAN)
+        ]
+        response = await aclient.post("/api/generate-plan/stream", data=_FORM_DATA)
+        done = sse_payloads(response)[-1]
+        assert done["done"] is True and "Streamed plan" in done["html_plan"]
+        assert [call["max_tokens"] for call in fake_completions.calls] == [
+            app_module.PLAN_MAX_TOKENS, app_module.PLAN_RETRY_MAX_TOKENS
+        ]
+
+    @pytest.mark.asyncio
+    async def test_upstream_failure_sends_error_event(self, aclient, fake_completions):
+        """Test a failed model call ends the stream with an error event"""
+        fake_completions.replies = [RuntimeError("upstream error")]
+        response = await aclient.post("/api/generate-plan/stream", data=_FORM_DATA)
+        [event] = sse_payloads(response)
+        assert "upstream error" in event["error"]
+
+
+@pytest.fixture
+def saved_files(app_module, monkeypatch):
+    """Record (folder, filename) for every storage save instead of writing the file"""
+    saved = []
+
+    async def fake_save_file(file_content, filename, folder, **kwargs):
+        saved.append((folder, filename))
+        return os.path.join(folder, filename)
+
+    monkeypatch.setattr(app_module.storage_manager, "save_file", fake_save_file)
+    return saved
+
+
+def make_upload(filename, content):
+    """Build an UploadFile like the one FastAPI hands to the endpoints"""
+    from io import BytesIO
+    from fastapi import UploadFile
+    return UploadFile(BytesIO(content), size=len(content), filename=filename)
+
+
+class TestRequestHelpers:
+    """Test form and upload parsing helpers"""
+
+    def test_interests_are_split_and_trimmed(self, app_module):
+        """Test interests are split on commas with surrounding whitespace and blanks dropped"""
+        profile = app_module.build_user_profile(
+            "beginner", "Student", " Machine Learning ,NLP,, AI  ",
+            "hands-on", "5-10-hours", "Learn AI"
+        )
+        assert profile.interests == ["Machine Learning", "NLP", "AI"]
+
+    @pytest.mark.asyncio
+    async def test_upload_filename_cannot_escape_uploads(self, app_module, saved_files):
+        """Test path separators in the uploaded filename are replaced before saving"""
+        resume_text = await app_module.process_resume(make_upload("../../x.txt", b"Python developer"))
+        assert resume_text == "Python developer"
+        
+        [(folder, filename)] = saved_files
+        assert folder == "uploads"
+        assert "/" not in filename and "\\" not in filename
+        stored_path = os.path.realpath(os.path.join(folder, filename))
+        assert os.path.dirname(stored_path) == os.path.realpath("uploads")
+
+    @pytest.mark.asyncio
+    async def test_unsupported_resume_type_rejected(self, aclient, saved_files):
+        """Test a resume with a disallowed extension gets 415 and is not stored"""
+        response = await aclient.post(
+            "/api/generate-plan",
+            data=_FORM_DATA,
+            files={"resume": ("resume.exe", b"MZ", "application/octet-stream")}
+        )
+        assert response.status_code == 415
+        assert saved_files == []
+
+    @pytest.mark.asyncio
+    async def test_oversized_resume_rejected(self, app_module, saved_files, monkeypatch):
+        """Test a resume over MAX_FILE_SIZE gets 413, even when its size is unknown up front"""
+        monkeypatch.setattr(app_module, "MAX_FILE_SIZE", 10)
+        upload = make_upload("resume.txt", b"x" * (app_module.UPLOAD_CHUNK_SIZE + 1))
+        upload.size = None
+        with pytest.raises(app_module.HTTPException) as exc_info:
+            await app_module.process_resume(upload)
+        assert exc_info.value.status_code == 413
+        assert saved_files == []
+
+    @pytest.mark.asyncio
+    async def test_oversized_request_rejected_before_parsing(self, app_module, aclient):
+        """Test a Content-Length over MAX_REQUEST_SIZE gets 413 without the body being read"""
+        response = await aclient.post(
+            "/api/generate-plan",
+            content=b"x",
+            headers={
+                "Content-Type": "multipart/form-data; boundary=x",
+                "Content-Length": str(app_module.MAX_REQUEST_SIZE + 1)
+            }
+        )
+        assert response.status_code == 413
+
+
+@pytest.fixture(scope="session")
+def fs_snapshot():
+    """Names in the project root and in static/, listed once per session"""
+    with os.scandir('.') as it:
+        root_entries = {entry.name for entry in it}
+    static_entries = set()
+    if 'static' in root_entries:
+        with os.scandir('static') as it:
+            static_entries = {entry.name for entry in it}
+    return root_entries, static_entries
+
+
 class TestDirectoryStructure:
     """Test required directories exist"""
     
-    def test_static_directory_exists(self):
+    def test_static_directory_exists(self, fs_snapshot):
         """Test static directory exists"""
-        assert os.path.exists('static'), "static directory should exist"
+        assert 'static' in fs_snapshot[0], "static directory should exist"
     
-    def test_index_html_exists(self):
+    def test_index_html_exists(self, fs_snapshot):
         """Test index.html exists in static directory"""
-        assert os.path.exists('static/index.html'), "static/index.html should exist"
+        assert 'index.html' in fs_snapshot[1], "static/index.html should exist"
     
-    def test_uploads_directory_exists(self):
+    def test_uploads_directory_exists(self, fs_snapshot):
         """Test uploads directory exists or is created"""
-        assert os.path.exists('uploads'), "uploads directory should exist"
+        assert 'uploads' in fs_snapshot[0], "uploads directory should exist"
     
-    def test_generated_directory_exists(self):
+    def test_generated_directory_exists(self, fs_snapshot):
         """Test generated directory exists or is created"""
-        assert os.path.exists('generated'), "generated directory should exist"
+        assert 'generated' in fs_snapshot[0], "generated directory should exist"
 
 
 class TestAzureOpenAIIntegration:
     """Test actual Azure OpenAI integration (requires valid credentials)"""
     
     @pytest.mark.integration
-    def test_simple_completion(self):
+    @pytest.mark.asyncio
+    @pytest.mark.skipif(_INTEGRATION_BATCH, reason="Covered by test_integration_batch")
+    async def test_simple_completion(self, settings, azure_client, llm_cache):
         """Test a simple completion with Azure OpenAI"""
         try:
-            azure_client = get_azure_openai_client()
-            response = azure_client.chat.completions.create(
-                model=os.getenv("AZURE_OPENAI_DEPLOYMENT_NAME", "gpt-4o"),
-                messages=[
-                    {"role": "system", "content": "You are a helpful assistant."},
-                    {"role": "user", "content": "Say 'Hello, Azure OpenAI!' and nothing else."}
-                ],
-                max_tokens=50
+            # Await on the session loop; the shared client's pooled connections belong to it
+            response = await azure_client.chat.completions.create(
+                model=settings['AZURE_OPENAI_DEPLOYMENT_NAME'] or "gpt-4o",
+                messages=_HELLO_MESSAGES,
+                max_tokens=10,
+                temperature=0
             )
             
             assert response is not None, "Response should not be None"
@@ -167,21 +540,12 @@ class TestAzureOpenAIIntegration:
             pytest.fail(f"Azure OpenAI integration test failed: {str(e)}")
     
     @pytest.mark.integration
-    def test_generate_plan_endpoint_integration(self):
+    @pytest.mark.asyncio
+    @pytest.mark.skipif(_INTEGRATION_BATCH, reason="Covered by test_integration_batch")
+    async def test_generate_plan_endpoint_integration(self, aclient, llm_cache):
         """Test full plan generation with real Azure OpenAI call"""
-        form_data = {
-            "experience_level": "intermediate",
-            "job_role": "Software Developer",
-            "interests": "Machine Learning, Deep Learning",
-            "learning_style": "hands-on",
-            "time_commitment": "10-20-hours",
-            "goals": "Become an AI/ML Engineer and build production ML systems",
-            "current_skills": "Python, JavaScript, SQL",
-            "preferred_technologies": "PyTorch, TensorFlow"
-        }
-        
         try:
-            response = client.post("/api/generate-plan", data=form_data)
+            response = await aclient.post("/api/generate-plan", data=_FORM_DATA)
             
             # Print response details for debugging
             print(f"\n✓ Status Code: {response.status_code}")
@@ -201,17 +565,39 @@ class TestAzureOpenAIIntegration:
             
         except Exception as e:
             pytest.fail(f"Full integration test failed: {str(e)}")
+    
+    @pytest.mark.integration
+    @pytest.mark.asyncio
+    async def test_integration_batch(self, settings, azure_client, aclient, llm_cache):
+        """Run the completion and full plan generation calls concurrently"""
+        completion, plan_response = await asyncio.gather(
+            azure_client.chat.completions.create(
+                model=settings['AZURE_OPENAI_DEPLOYMENT_NAME'] or "gpt-4o",
+                messages=_HELLO_MESSAGES,
+                max_tokens=10,
+                temperature=0
+            ),
+            aclient.post("/api/generate-plan", data=_FORM_DATA)
+        )
+        
+        assert len(completion.choices) > 0, "Should have at least one choice"
+        assert completion.choices[0].message.content is not None, "Should have content"
+        
+        assert plan_response.status_code == 200, f"Expected 200, got {plan_response.status_code}"
+        data = plan_response.json()
+        assert data['success'] == True, "Success should be True"
+        assert len(data['html_plan']) > 100, "HTML plan should be substantial"
 
 
-def test_print_configuration():
+def test_print_configuration(settings):
     """Helper test to print current configuration (for debugging)"""
     print("\n" + "="*60)
     print("CURRENT CONFIGURATION")
     print("="*60)
-    print(f"Endpoint: {os.getenv('AZURE_OPENAI_ENDPOINT')}")
-    print(f"API Key: {'*' * 40}{os.getenv('AZURE_OPENAI_API_KEY', '')[-8:]}")
-    print(f"Deployment: {os.getenv('AZURE_OPENAI_DEPLOYMENT_NAME')}")
-    print(f"API Version: {os.getenv('AZURE_OPENAI_API_VERSION')}")
+    print(f"Endpoint: {settings['AZURE_OPENAI_ENDPOINT']}")
+    print(f"API Key: {'*' * 40}{(settings['AZURE_OPENAI_API_KEY'] or '')[-8:]}")
+    print(f"Deployment: {settings['AZURE_OPENAI_DEPLOYMENT_NAME']}")
+    print(f"API Version: {settings['AZURE_OPENAI_API_VERSION']}")
     print("="*60 + "\n")
 
 